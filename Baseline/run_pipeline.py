@@ -1,33 +1,108 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import json
+import mmap
 import os
+import re
 import shlex
 import shutil
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
+try:
+    import httpx
+except ImportError:  # Optional fast path; we fall back to shelling out to gh.
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # Optional fast path; stdlib json works everywhere.
+    orjson = None
+
+
+def _json_bytes(obj: object) -> bytes:
+    """Serialize `obj` to indented UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _dump_json(path: Path, obj: object) -> None:
+    """
+    Serialize `obj` to `path` as indented JSON. orjson emits bytes directly
+    (no intermediate str + re-encode); the stdlib fallback streams via
+    json.dump so the full document is never materialized as one string.
+    """
+    if orjson is not None:
+        path.write_bytes(_json_bytes(obj))
+    else:
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
+# Serializes console output across worker threads so progress lines don't interleave.
+_PRINT_LOCK = threading.Lock()
+
+# Per-repo locks: two items targeting the same repo must not clone/run/remove
+# the same checkout concurrently.
+_REPO_LOCKS: Dict[str, threading.Lock] = {}
+_REPO_LOCKS_GUARD = threading.Lock()
+
+
+def log(msg: str) -> None:
+    with _PRINT_LOCK:
+        print(msg)
+
+
+def _repo_lock(repo_full_name: str) -> threading.Lock:
+    with _REPO_LOCKS_GUARD:
+        return _REPO_LOCKS.setdefault(repo_full_name, threading.Lock())
+
 
 def run_cmd(
     cmd: List[str],
     cwd: Path | None = None,
     env: Dict[str, str] | None = None,
     capture_output: bool = True,
+    text: bool = False,
+    discard_output: bool = False,
 ) -> subprocess.CompletedProcess:
+    # Bytes by default: most call sites either discard the output or feed it
+    # to parsers that accept bytes, so the locale decode + universal-newline
+    # translation of text mode is pure overhead on the hot paths.
+    # discard_output routes stdout to /dev/null for callers that never read
+    # it (clones, fetches, worktree ops), avoiding the pipe buffering of
+    # potentially MBs of progress chatter; stderr is still captured for the
+    # error message below.
+    if discard_output:
+        io_kwargs: Dict[str, object] = {
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.PIPE,
+        }
+    else:
+        io_kwargs = {"capture_output": capture_output}
     try:
         return subprocess.run(
             cmd,
             cwd=str(cwd) if cwd else None,
             env=env,
             check=True,
-            text=True,
-            capture_output=capture_output,
+            text=text,
+            **io_kwargs,
         )
     except subprocess.CalledProcessError as e:
-        stderr = (e.stderr or "").strip()
-        stdout = (e.stdout or "").strip()
-        details = stderr or stdout or "No stderr/stdout output."
+        stderr = e.stderr or ""
+        stdout = e.stdout or ""
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode(errors="replace")
+        if isinstance(stdout, bytes):
+            stdout = stdout.decode(errors="replace")
+        details = stderr.strip() or stdout.strip() or "No stderr/stdout output."
         cmd_text = " ".join(shlex.quote(part) for part in e.cmd)
         raise RuntimeError(
             f"Command failed (exit {e.returncode}): {cmd_text}\n{details}"
@@ -39,76 +114,419 @@ def run_cmd(
         ) from e
 
 
+def run_cmd_text(
+    cmd: List[str],
+    cwd: Path | None = None,
+    env: Dict[str, str] | None = None,
+) -> subprocess.CompletedProcess:
+    """run_cmd for the few call sites that consume stdout as str."""
+    return run_cmd(cmd, cwd=cwd, env=env, text=True)
+
+
 def load_map(path: Path) -> List[dict]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    if orjson is not None:
+        # Parse straight out of a read-only mmap: no text-mode decode pass,
+        # and peak RSS stays near the file size for large batch maps.
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                view = memoryview(mm)
+                try:
+                    data = orjson.loads(view)
+                finally:
+                    view.release()
+                    mm.close()
+            else:
+                data = orjson.loads(f.read())
+    else:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
     if not isinstance(data, list):
         raise ValueError("issue_pr_map.json must be a JSON array.")
     return data
 
 
-def ensure_repo(repo_full_name: str, repos_root: Path) -> Tuple[Path, bool]:
+def ensure_mirror(repo_full_name: str, mirror_root: Path) -> Path:
+    """
+    Clone-or-refresh a bare blobless mirror for the repo. One mirror is
+    shared by every item (and every run) touching the repo; per-item
+    checkouts are cheap worktrees against it, so the pack download is paid
+    once instead of once per issue. Blobless (not shallow) because worktrees
+    need arbitrary PR shas, not just HEAD.
+    """
+    mirror = mirror_root / f"{repo_full_name}.git"
+    with _repo_lock(repo_full_name):
+        if mirror.exists():
+            # The explicit refspec makes the refresh work even for mirrors
+            # created by a plain --bare clone, which configures no
+            # remote.origin.fetch refspec at all (a bare 'git fetch origin'
+            # would only resolve FETCH_HEAD and never advance refs/heads/*).
+            run_cmd(
+                [
+                    "git",
+                    "-C",
+                    str(mirror),
+                    "-c",
+                    "fetch.parallel=0",
+                    "fetch",
+                    "--prune",
+                    "origin",
+                    "+refs/*:refs/*",
+                ],
+                discard_output=True,
+            )
+            return mirror
+        mirror.parent.mkdir(parents=True, exist_ok=True)
+        # --mirror (implies --bare) sets up the +refs/*:refs/* refspec and on
+        # GitHub also fetches refs/pull/*, so PR head shas are usually
+        # already present without the per-item pull/N/head fetch.
+        clone_args = ["--mirror", "--filter=blob:none"]
+        try:
+            run_cmd(
+                ["gh", "repo", "clone", repo_full_name, str(mirror), "--"]
+                + clone_args,
+                discard_output=True,
+            )
+        except RuntimeError:
+            # Fallback to git clone via HTTPS when gh clone fails.
+            run_cmd(
+                ["git", "clone", *clone_args, f"https://github.com/{repo_full_name}.git", str(mirror)],
+                discard_output=True,
+            )
+    return mirror
+
+
+def _mirror_has_commit(mirror: Path, sha: str) -> bool:
+    try:
+        run_cmd(
+            ["git", "-C", str(mirror), "rev-parse", "--quiet", "--verify", f"{sha}^{{commit}}"]
+        )
+        return True
+    except RuntimeError:
+        return False
+
+
+def ensure_repo(
+    repo_full_name: str,
+    repos_root: Path,
+    mirror: Path,
+    commit_sha: str,
+    pr_number: int,
+    issue_number: int,
+) -> Path:
     repo_name = repo_full_name.split("/")[-1]
-    repo_dir = repos_root / repo_name
-    if (repo_dir / ".git").exists():
-        return repo_dir, False
-    if repo_dir.exists() and not (repo_dir / ".git").exists():
-        raise RuntimeError(
-            f"Target path exists but is not a git repo: {repo_dir}. "
-            "Delete/rename it or choose a different --repos-root."
+    # Issue number in the path: the map can carry the same PR under several
+    # issues, and concurrent items must not share a worktree.
+    repo_dir = repos_root / f"{repo_name}-i{issue_number}-pr{pr_number}"
+
+    with _repo_lock(repo_full_name):
+        if repo_dir.exists():
+            # Leftover from a dry run or an item that died mid-flight;
+            # recycle it so reruns don't need manual worktree cleanup.
+            _remove_worktree(mirror, repo_dir)
+        sha = commit_sha
+        if sha and not _mirror_has_commit(mirror, sha):
+            # PR heads on forks aren't in the mirror's default refs; the
+            # pull ref on the upstream repo always has them.
+            try:
+                run_cmd(
+                    ["git", "-C", str(mirror), "fetch", "origin", f"pull/{pr_number}/head"],
+                    discard_output=True,
+                )
+            except RuntimeError:
+                pass
+        if sha and not _mirror_has_commit(mirror, sha):
+            sha = ""
+        run_cmd(
+            [
+                "git",
+                "-C",
+                str(mirror),
+                "worktree",
+                "add",
+                "--detach",
+                str(repo_dir),
+                sha or "HEAD",
+            ],
+            discard_output=True,
         )
+    return repo_dir
 
+
+def _remove_worktree(mirror: Path, repo_dir: Path) -> None:
+    """Remove a worktree checkout. Caller must hold the repo lock."""
     try:
-        run_cmd(["gh", "repo", "clone", repo_full_name, str(repo_dir)], cwd=repos_root)
-    except RuntimeError:
-        # Fallback to git clone via HTTPS when gh clone fails.
         run_cmd(
-            ["git", "clone", f"https://github.com/{repo_full_name}.git", str(repo_dir)],
-            cwd=repos_root,
+            ["git", "-C", str(mirror), "worktree", "remove", "--force", str(repo_dir)],
+            discard_output=True,
         )
-    return repo_dir, True
+    except RuntimeError:
+        shutil.rmtree(repo_dir, ignore_errors=True)
+        run_cmd(["git", "-C", str(mirror), "worktree", "prune"], discard_output=True)
+
+
+def remove_repo(repo_full_name: str, mirror: Path, repo_dir: Path) -> None:
+    with _repo_lock(repo_full_name):
+        _remove_worktree(mirror, repo_dir)
+
+
+# GitHub API disk cache. Configured from CLI flags in main(); keyed by
+# endpoint+accept so reruns/resumed batches don't re-pay the rate-limit cost.
+_CACHE_DIR = Path.home() / ".cache" / "codex_pipeline" / "gh"
+_CACHE_ENABLED = True
+_CACHE_TTL_SECONDS = 24 * 3600
+
+
+# Persistent authenticated HTTP client (created once in main). Keeps one
+# pooled TCP/TLS connection across all items and skips the ~150-300 ms gh
+# process cold start per API call. None means "shell out to gh" fallback.
+_HTTP_CLIENT = None
+
+
+def _init_http_client() -> None:
+    global _HTTP_CLIENT
+    if httpx is None:
+        return
+    try:
+        token = subprocess.check_output(["gh", "auth", "token"], text=True).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError, OSError):
+        return
+    if not token:
+        return
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    kwargs = dict(
+        base_url="https://api.github.com",
+        headers=headers,
+        timeout=60.0,
+        follow_redirects=True,
+    )
+    try:
+        _HTTP_CLIENT = httpx.Client(http2=True, **kwargs)
+    except ImportError:
+        # http2 extra (h2) not installed; HTTP/1.1 keep-alive still wins.
+        _HTTP_CLIENT = httpx.Client(**kwargs)
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _write_stream_meta(meta_path: Path, endpoint: str, etag: str) -> None:
+    _atomic_write_text(
+        meta_path,
+        json.dumps({"etag": etag, "fetched_at": time.time(), "endpoint": endpoint}),
+    )
+
+
+def gh_api_stream(endpoint: str, accept: str, dest: Path) -> None:
+    """
+    Fetch an endpoint body straight to `dest` without materializing it as a
+    Python string. Large PR patches otherwise triple peak memory (subprocess
+    buffer + str + write_text encode).
+
+    Cached entries within the TTL are served from disk; expired entries are
+    revalidated with If-None-Match, and a 304 reuses the cached body without
+    counting against the rate limit (httpx path only — the gh fallback can't
+    observe response headers while streaming, so it refetches on expiry).
+    """
+    cache_path: Path | None = None
+    meta_path: Path | None = None
+    etag = ""
+    if _CACHE_ENABLED:
+        key = hashlib.sha1(f"{endpoint}\n{accept}".encode()).hexdigest()
+        cache_path = _CACHE_DIR / f"{key}.bin"
+        meta_path = _CACHE_DIR / f"{key}.meta.json"
+        if cache_path.exists():
+            fetched_at = 0.0
+            if meta_path.exists():
+                try:
+                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    etag = meta.get("etag", "")
+                    fetched_at = meta.get("fetched_at", 0)
+                except (OSError, ValueError):
+                    pass
+            if time.time() - fetched_at < _CACHE_TTL_SECONDS:
+                shutil.copyfile(cache_path, dest)
+                return
+
+    tmp = dest.with_name(dest.name + ".tmp")
+    new_etag = ""
+    if _HTTP_CLIENT is not None:
+        headers = {"Accept": accept}
+        if etag:
+            headers["If-None-Match"] = etag
+        with _HTTP_CLIENT.stream("GET", "/" + endpoint, headers=headers) as resp:
+            if resp.status_code == 304 and cache_path is not None:
+                # Revalidated: the cached body is still current; refresh the
+                # freshness window and serve from disk.
+                shutil.copyfile(cache_path, dest)
+                _write_stream_meta(meta_path, endpoint, etag)
+                return
+            if resp.status_code >= 400:
+                resp.read()
+                raise RuntimeError(
+                    f"GitHub API request failed ({resp.status_code}): {endpoint}"
+                )
+            new_etag = resp.headers.get("etag", "")
+            with tmp.open("wb") as f:
+                for chunk in resp.iter_bytes(1 << 20):
+                    f.write(chunk)
+    else:
+        cmd = ["gh", "api", endpoint, "-H", f"Accept: {accept}"]
+        with tmp.open("wb") as f, subprocess.Popen(
+            cmd, stdout=f, stderr=subprocess.PIPE
+        ) as p:
+            _, stderr = p.communicate()
+            if p.returncode != 0:
+                tmp.unlink(missing_ok=True)
+                details = stderr.decode(errors="replace").strip() or "No stderr output."
+                raise RuntimeError(
+                    f"Command failed (exit {p.returncode}): "
+                    f"{' '.join(shlex.quote(part) for part in cmd)}\n{details}"
+                )
+    os.replace(tmp, dest)
 
+    if cache_path is not None:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_tmp = cache_path.with_name(cache_path.name + ".tmp")
+        shutil.copyfile(dest, cache_tmp)
+        os.replace(cache_tmp, cache_path)
+        _write_stream_meta(meta_path, endpoint, new_etag)
 
-def gh_api_json(endpoint: str) -> dict:
-    out = run_cmd(["gh", "api", endpoint]).stdout
-    return json.loads(out)
 
+_METADATA_QUERY = """
+query($owner: String!, $name: String!, $issue: Int!, $pr: Int!) {
+  repository(owner: $owner, name: $name) {
+    issue(number: $issue) { number title body url }
+    pullRequest(number: $pr) { number title body url baseRefOid headRefOid }
+  }
+}
+"""
 
-def gh_api_text(endpoint: str, accept: str) -> str:
-    return run_cmd(["gh", "api", endpoint, "-H", f"Accept: {accept}"]).stdout
+
+def gh_graphql(query: str, variables: Dict[str, object]) -> dict:
+    if _CACHE_ENABLED:
+        cache_key = hashlib.sha1(
+            json.dumps([query, variables], sort_keys=True).encode()
+        ).hexdigest()
+        body_path = _CACHE_DIR / f"{cache_key}.graphql.json"
+        if body_path.exists() and time.time() - body_path.stat().st_mtime < _CACHE_TTL_SECONDS:
+            return json.loads(body_path.read_text(encoding="utf-8"))
+
+    if _HTTP_CLIENT is not None:
+        resp = _HTTP_CLIENT.post(
+            "/graphql", json={"query": query, "variables": variables}
+        )
+        if resp.status_code >= 400:
+            raise RuntimeError(
+                f"GraphQL request failed ({resp.status_code}): {resp.text[:500]}"
+            )
+        out = resp.text
+    else:
+        cmd = ["gh", "api", "graphql", "-f", f"query={query}"]
+        for key, value in variables.items():
+            cmd += ["-F", f"{key}={value}"]
+        out = run_cmd_text(cmd).stdout
+    data = json.loads(out)
+    if data.get("errors"):
+        raise RuntimeError(f"GraphQL query failed: {data['errors']}")
+    if _CACHE_ENABLED:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(body_path, out)
+    return data
+
+
+def fetch_github_metadata(
+    repo_full_name: str, issue_number: int, pr_number: int, patch_dest: Path
+) -> Tuple[dict, dict]:
+    """
+    Fetch issue + PR metadata in one GraphQL round-trip and stream the PR
+    patch (no GraphQL equivalent) to `patch_dest` via REST, running both
+    requests concurrently. Returns (issue, pr) shaped like the REST responses
+    main() historically consumed.
+    """
+    owner, name = repo_full_name.split("/", 1)
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        graphql_fut = ex.submit(
+            gh_graphql,
+            _METADATA_QUERY,
+            {"owner": owner, "name": name, "issue": issue_number, "pr": pr_number},
+        )
+        patch_fut = ex.submit(
+            gh_api_stream,
+            f"repos/{repo_full_name}/pulls/{pr_number}",
+            "application/vnd.github.v3.patch",
+            patch_dest,
+        )
+        data = graphql_fut.result()
+        patch_fut.result()
+
+    repository = (data.get("data") or {}).get("repository") or {}
+    raw_issue = repository.get("issue") or {}
+    raw_pr = repository.get("pullRequest") or {}
+    if not raw_issue or not raw_pr:
+        raise RuntimeError(
+            f"GraphQL returned no issue/PR for {repo_full_name} "
+            f"issue#{issue_number} pr#{pr_number}"
+        )
+
+    issue = {
+        "number": raw_issue.get("number"),
+        "title": raw_issue.get("title", ""),
+        "body": raw_issue.get("body", ""),
+        "html_url": raw_issue.get("url", ""),
+    }
+    pr = {
+        "number": raw_pr.get("number"),
+        "title": raw_pr.get("title", ""),
+        "body": raw_pr.get("body", ""),
+        "html_url": raw_pr.get("url", ""),
+        "base": {"sha": raw_pr.get("baseRefOid", "")},
+        "head": {"sha": raw_pr.get("headRefOid", "")},
+    }
+    return issue, pr
 
 
 def parse_codex_template(path: Path) -> Tuple[Dict[str, str], List[str]]:
     text = path.read_text(encoding="utf-8")
-    lines = [ln.rstrip() for ln in text.splitlines()]
 
+    # Single pass over the template: collect export KEY=value lines and merge
+    # the backslash-continued codex exec command as we encounter them, rather
+    # than traversing the text once per concern.
     export_env: Dict[str, str] = {}
-    for ln in lines:
+    merged: List[str] = []
+    in_cmd = False
+    cmd_done = False
+    for ln in text.splitlines():
         stripped = ln.strip()
-        if stripped.startswith("export ") and "=" in stripped:
+        if not in_cmd and not cmd_done and "codex exec" in ln:
+            in_cmd = True
+        if in_cmd:
+            if not stripped:
+                continue
+            if stripped.endswith("\\"):
+                merged.append(stripped[:-1].strip())
+            else:
+                merged.append(stripped)
+                in_cmd = False
+                cmd_done = True
+            continue
+        if stripped.startswith("export "):
             # Supports export KEY=value syntax.
-            _, body = stripped.split("export ", 1)
-            key, val = body.split("=", 1)
-            export_env[key.strip()] = val.strip().strip('"').strip("'")
-
-    cmd_start = None
-    for i, ln in enumerate(lines):
-        if "codex exec" in ln:
-            cmd_start = i
-            break
-    if cmd_start is None:
-        raise ValueError(f"No 'codex exec' command found in {path}.")
+            key, sep, val = stripped.removeprefix("export ").partition("=")
+            if sep:
+                export_env[key.strip()] = val.strip().strip('"').strip("'")
 
-    merged = []
-    for ln in lines[cmd_start:]:
-        stripped = ln.strip()
-        if not stripped:
-            continue
-        if stripped.endswith("\\"):
-            merged.append(stripped[:-1].strip())
-        else:
-            merged.append(stripped)
-            break
+    if not merged:
+        raise ValueError(f"No 'codex exec' command found in {path}.")
 
     cmd_str = " ".join(merged)
     cmd_tokens = shlex.split(cmd_str)
@@ -129,74 +547,194 @@ def build_prompt(template: str, issue: dict, pr: dict) -> str:
     pr_body = pr.get("body", "") or "(empty)"
     pr_url = pr.get("html_url", "")
 
-    return (
-        f"{template.strip()}\n\n"
-        "## 3) Context from GitHub\n\n"
-        f"### Issue: {issue_title}\n\n"
-        f"{issue_body}\n\n"
-        f"### PR: {pr_title}\n\n"
-        f"{pr_body}\n\n"
-        f"PR URL: {pr_url}\n"
+    # Single join over the chunks: the large issue/PR bodies are copied once
+    # into the result instead of through intermediate f-string concatenations.
+    return "".join(
+        (
+            template.strip(),
+            "\n\n## 3) Context from GitHub\n\n### Issue: ",
+            issue_title,
+            "\n\n",
+            issue_body,
+            "\n\n### PR: ",
+            pr_title,
+            "\n\n",
+            pr_body,
+            "\n\nPR URL: ",
+            pr_url,
+            "\n",
+        )
     )
 
 
 def parse_changed_paths(repo_dir: Path) -> Set[Path]:
     """
-    Parse paths from `git status --porcelain` and return changed/untracked files.
+    Parse `git status --porcelain=v2 -z` output and return changed/untracked
+    files. NUL-terminated records are unambiguous for paths containing spaces
+    or non-UTF-8 bytes, and keeping the output as bytes skips the text-mode
+    decode and newline translation on large statuses.
     """
-    status = run_cmd(["git", "status", "--porcelain"], cwd=repo_dir).stdout
+    status = run_cmd(
+        [
+            "git",
+            "status",
+            "--porcelain=v2",
+            "-z",
+            "--untracked-files=all",
+            "--no-renames",
+        ],
+        cwd=repo_dir,
+    ).stdout
     changed: Set[Path] = set()
-    for raw in status.splitlines():
-        line = raw.rstrip()
-        if not line:
+    for record in status.split(b"\x00"):
+        # v2 records: '1 <fields...> <path>' (changed), '? <path>' (untracked),
+        # 'u <fields...> <path>' (unmerged); '#' headers are skipped. Rename
+        # records ('2') cannot appear with --no-renames.
+        if not record or record.startswith(b"#"):
+            continue
+        kind = record[:1]
+        if kind == b"1":
+            payload = record.split(b" ", 8)[8]
+        elif kind == b"?":
+            payload = record[2:]
+        elif kind == b"u":
+            payload = record.split(b" ", 10)[10]
+        else:
             continue
-        payload = line[3:] if len(line) > 3 else ""
-        if " -> " in payload:
-            payload = payload.split(" -> ", 1)[1]
-        rel_path = Path(payload.strip())
-        if rel_path:
-            changed.add(rel_path)
+        if payload:
+            changed.add(Path(os.fsdecode(payload)))
     return changed
 
 
+# Directories that never contain artifacts we keep; pruning them skips the
+# bulk of the stat calls on a typical repo.
+_SKIP_DIRS = frozenset(
+    {".git", "node_modules", ".venv", "__pycache__", "dist", "build", ".mypy_cache"}
+)
+
+# Kept-file classifiers, compiled once: Dockerfile / Dockerfile.*, and
+# test*.py with 'test' matched case-insensitively (the .py suffix is not).
+_DOCKERFILE_RE = re.compile(r"Dockerfile(\..+)?$")
+_TEST_PY_RE = re.compile(r"[Tt][Ee][Ss][Tt].*\.py$")
+
+
 def collect_special_files(repo_dir: Path) -> Set[Path]:
     """
     Keep Docker and test artifacts even if users want a minimal final package.
+
+    Scans the repo root and one directory level down for Dockerfile* and
+    test*.py plus the full tests/ subtree — where these artifacts live in
+    practice — instead of walking the entire repo. Agent-created files
+    elsewhere are already captured via git status.
     """
     keep: Set[Path] = set()
-    for p in repo_dir.rglob("*"):
-        if not p.is_file():
-            continue
-        rel = p.relative_to(repo_dir)
-        name = p.name
-        lower = name.lower()
-        if name == "Dockerfile" or name.startswith("Dockerfile."):
-            keep.add(rel)
-            continue
-        if lower.startswith("test") and p.suffix == ".py":
-            keep.add(rel)
+    repo_prefix_len = len(str(repo_dir)) + 1
+    docker_match = _DOCKERFILE_RE.match
+    test_match = _TEST_PY_RE.match
+
+    def classify(entry: os.DirEntry) -> None:
+        if docker_match(entry.name) or test_match(entry.name):
+            keep.add(Path(entry.path[repo_prefix_len:]))
+
+    subdirs: List[os.DirEntry] = []
+    with os.scandir(repo_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _SKIP_DIRS:
+                    subdirs.append(entry)
+            elif entry.is_file(follow_symlinks=False):
+                classify(entry)
+
+    for subdir in subdirs:
+        if subdir.name == "tests":
+            # Full DFS of tests/: every .py file under it is kept.
+            stack = [subdir.path]
+            while stack:
+                current = stack.pop()
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in _SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and entry.name.endswith(".py"):
+                            keep.add(Path(entry.path[repo_prefix_len:]))
             continue
-        if rel.parts and rel.parts[0] == "tests" and p.suffix == ".py":
-            keep.add(rel)
+        with os.scandir(subdir.path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    classify(entry)
     return keep
 
 
+def _copy_one(src: Path, dst: Path) -> None:
+    """
+    shutil.copy2 with a zero-copy in-kernel sendfile transfer where the
+    platform supports it (Linux); falls back to the portable copy otherwise.
+    """
+    try:
+        size = src.stat().st_size
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        shutil.copystat(src, dst)
+    except (AttributeError, OSError):
+        shutil.copy2(src, dst)
+
+
+def _place(src: Path, dst: Path) -> None:
+    """
+    Hard-link src to dst when both live on the same filesystem (an inode-only
+    op, no bytes moved), falling back to a copy cross-device or on platforms
+    without link support. Only valid for files the consumer reads but never
+    mutates in place — true for everything the checker bundle contains.
+    """
+    try:
+        dst.unlink(missing_ok=True)
+        os.link(src, dst)
+    except OSError:
+        _copy_one(src, dst)
+
+
+def _copy_many(pairs: List[Tuple[Path, Path]], link: bool = False) -> None:
+    """
+    Copy (src, dst) pairs concurrently. The work is almost entirely
+    syscall-bound, so a small thread pool overlaps it well; parent
+    directories are created in a pre-pass to avoid concurrent mkdir races.
+    With link=True, placements go through _place (hard-link when possible).
+    """
+    place = _place if link else _copy_one
+    for parent in {dst.parent for _, dst in pairs}:
+        parent.mkdir(parents=True, exist_ok=True)
+    if len(pairs) <= 1:
+        for src, dst in pairs:
+            place(src, dst)
+        return
+    with ThreadPoolExecutor(max_workers=min(16, len(pairs))) as ex:
+        list(ex.map(lambda pair: place(*pair), pairs))
+
+
 def copy_repo_files(repo_dir: Path, rel_paths: Set[Path], dest_dir: Path) -> None:
     dest_dir.mkdir(parents=True, exist_ok=True)
-    for rel in sorted(rel_paths):
+    pairs: List[Tuple[Path, Path]] = []
+    # No sort: nothing downstream depends on copy order, the result is just a
+    # filesystem tree.
+    for rel in rel_paths:
         src = repo_dir / rel
         if not src.exists() or not src.is_file():
             continue
-        dst = dest_dir / rel
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
+        pairs.append((src, dest_dir / rel))
+    _copy_many(pairs)
 
 
 def create_checker_bundle(
     export_dir: Path,
     issue: dict,
     pr: dict,
-    patch_text: str,
+    patch_path: Path,
 ) -> Dict[str, str]:
     """
     Create a SWEGENT-like bundle layout that can be consumed directly by
@@ -211,6 +749,8 @@ def create_checker_bundle(
     base_sha = pr.get("base", {}).get("sha", "")
     head_sha = pr.get("head", {}).get("sha", "")
 
+    # The checker expects the patch text embedded in the bundle JSON, so this
+    # is the one place it gets read into memory.
     bundle_issue = {
         "number": issue_number,
         "url": issue_url,
@@ -218,40 +758,39 @@ def create_checker_bundle(
             {
                 "base_sha": base_sha,
                 "head_sha": head_sha,
-                "patch": patch_text,
+                "patch": patch_path.read_text(encoding="utf-8"),
             }
         ],
     }
     issue_json_path = bundle_dir / f"issue_{issue_number}.json"
-    issue_json_path.write_text(
-        json.dumps(bundle_issue, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    _dump_json(issue_json_path, bundle_issue)
 
     docker_src = files_dir / "Dockerfile"
     docker_dst = bundle_dir / "codex.dockerfile"
     docker_root_dst = export_dir / "codex.dockerfile"
     if docker_src.exists() and docker_src.is_file():
-        shutil.copy2(docker_src, docker_dst)
-        shutil.copy2(docker_src, docker_root_dst)
+        _place(docker_src, docker_dst)
+        _place(docker_src, docker_root_dst)
 
-    copied_tests = 0
     # Recursively collect test*.py under files/, then flatten into bundle and export root.
     seen_names: Set[str] = set()
-    for test_file in sorted(files_dir.rglob("test*.py")):
+    test_pairs: List[Tuple[Path, Path]] = []
+    # Unsorted: seen_names already dedupes, and placement order is irrelevant.
+    for test_file in files_dir.rglob("test*.py"):
         if not test_file.is_file():
             continue
         name = test_file.name
         if name in seen_names:
             continue
         seen_names.add(name)
-        shutil.copy2(test_file, bundle_dir / name)
-        shutil.copy2(test_file, export_dir / name)
-        copied_tests += 1
+        test_pairs.append((test_file, bundle_dir / name))
+        test_pairs.append((test_file, export_dir / name))
+    _copy_many(test_pairs, link=True)
+    copied_tests = len(seen_names)
 
     # Also place issue_<n>.json at export root for direct checker input.
     issue_root_path = export_dir / f"issue_{issue_number}.json"
-    shutil.copy2(issue_json_path, issue_root_path)
+    _place(issue_json_path, issue_root_path)
 
     return {
         "bundle_dir": str(bundle_dir),
@@ -281,7 +820,163 @@ def copy_f2p_checker_files(src_files: List[Path], baseline_dir: Path) -> List[Pa
     return copied
 
 
+def process_item(
+    item: dict,
+    args: argparse.Namespace,
+    base_env: Dict[str, str],
+    codex_base_cmd: List[str],
+    prompt_template: str,
+    repos_root: Path,
+    result_root: Path,
+    mirror_root: Path,
+    f2p_checker_files: List[Path],
+    codex_gate: threading.BoundedSemaphore,
+) -> dict:
+    repo = item["repo"]
+    issue_number = int(item["issue_number"])
+    pr_number = int(item["pr_number"])
+    repo_name = repo.split("/")[-1]
+
+    # A plain pre-existing checkout at repos_root/<name> (e.g. user-managed)
+    # is reused as before and never removed — but it is *shared* by every
+    # item on the repo, so the whole item must hold the repo lock there:
+    # concurrent codex runs, git status and export copies would otherwise
+    # cross-contaminate one working tree. Worktree items get independent
+    # checkouts and only lock around mirror mutations (inside the helpers).
+    legacy_dir = repos_root / repo_name
+    use_legacy = (legacy_dir / ".git").exists()
+    if legacy_dir.exists() and not use_legacy:
+        raise RuntimeError(
+            f"Target path exists but is not a git repo: {legacy_dir}. "
+            "Delete/rename it or choose a different --repos-root."
+        )
+
+    with _repo_lock(repo) if use_legacy else nullcontext():
+        # Issue number in the staging name: the map can carry the same PR
+        # under several issues, and concurrent items must not share files.
+        patch_staging = repos_root / f".{repo_name}-i{issue_number}-pr{pr_number}.patch"
+        mirror: Path | None = None
+        if use_legacy:
+            issue, pr = fetch_github_metadata(
+                repo, issue_number, pr_number, patch_staging
+            )
+            repo_dir, created_now = legacy_dir, False
+        else:
+            # The metadata/patch fetch and the mirror clone/refresh are
+            # independent; overlap them. The patch is staged under repos_root
+            # because the worktree it finally lives in needs pr.head.sha from
+            # the metadata fetch.
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                meta_fut = ex.submit(
+                    fetch_github_metadata, repo, issue_number, pr_number, patch_staging
+                )
+                mirror_fut = ex.submit(ensure_mirror, repo, mirror_root)
+                issue, pr = meta_fut.result()
+                mirror = mirror_fut.result()
+            repo_dir = ensure_repo(
+                repo,
+                repos_root,
+                mirror,
+                pr.get("head", {}).get("sha", ""),
+                pr_number,
+                issue_number,
+            )
+            created_now = True
+
+        baseline_dir = repo_dir / args.baseline_dir_name
+        baseline_dir.mkdir(parents=True, exist_ok=True)
+        copied_checker_paths = copy_f2p_checker_files(f2p_checker_files, baseline_dir)
+
+        patch_path = baseline_dir / f"pr_{pr_number}.patch"
+        shutil.move(str(patch_staging), patch_path)
+
+        issue_body = issue.get("body", "") or ""
+        codex_prompt = build_prompt(prompt_template, issue, pr)
+        codex_prompt_file = baseline_dir / f"codex_prompt_{issue_number}.md"
+
+        # Serialize everything to bytes up front and flush the small baseline
+        # files in one loop; write_bytes skips write_text's encode pass and
+        # none of these need individual durability.
+        writes: List[Tuple[Path, bytes]] = [
+            (baseline_dir / "issue.json", _json_bytes(issue)),
+            (baseline_dir / "pr.json", _json_bytes(pr)),
+            (baseline_dir / f"issue_{issue_number}.md", issue_body.encode("utf-8")),
+            (codex_prompt_file, codex_prompt.encode("utf-8")),
+        ]
+        for p, data in writes:
+            p.write_bytes(data)
+
+        if args.dry_run:
+            log(f"  - dry-run: generated files in {baseline_dir}")
+            return {
+                "repo": repo,
+                "issue_number": issue_number,
+                "pr_number": pr_number,
+                "dry_run": True,
+                "baseline_dir": str(baseline_dir),
+            }
+
+        cmd = codex_base_cmd + [codex_prompt]
+        log(f"  - running codex in {repo_dir} ...")
+        with codex_gate:
+            run_cmd(cmd, cwd=repo_dir, env=base_env, capture_output=False)
+
+        export_dir = result_root / repo_name / str(issue_number)
+        meta_dir = export_dir / "metadata"
+        files_dir = export_dir / "files"
+        meta_dir.mkdir(parents=True, exist_ok=True)
+
+        # Export collected GitHub metadata/context.
+        shutil.copy2(baseline_dir / "issue.json", meta_dir / "issue.json")
+        shutil.copy2(baseline_dir / "pr.json", meta_dir / "pr.json")
+        shutil.copy2(baseline_dir / f"pr_{pr_number}.patch", meta_dir / f"pr_{pr_number}.patch")
+        shutil.copy2(baseline_dir / f"issue_{issue_number}.md", meta_dir / f"issue_{issue_number}.md")
+        shutil.copy2(codex_prompt_file, meta_dir / codex_prompt_file.name)
+        if copied_checker_paths:
+            checker_export_dir = meta_dir / "f2p_checker"
+            checker_export_dir.mkdir(parents=True, exist_ok=True)
+            for p in copied_checker_paths:
+                shutil.copy2(p, checker_export_dir / p.name)
+
+        # Keep agent outputs + Docker/Test artifacts in final package.
+        changed_paths = parse_changed_paths(repo_dir)
+        keep_paths = set(changed_paths)
+        if args.keep_special:
+            keep_paths |= collect_special_files(repo_dir)
+        copy_repo_files(repo_dir, keep_paths, files_dir)
+
+        summary = {
+            "repo": repo,
+            "issue_number": issue_number,
+            "pr_number": pr_number,
+            "export_dir": str(export_dir),
+            "changed_files_count": len(changed_paths),
+            "kept_files_count": len(keep_paths),
+            "repo_removed": created_now,
+            "f2p_checker_files": [str(p) for p in copied_checker_paths],
+        }
+
+        # Generate checker-ready bundle (issue_*.json + *.dockerfile + test*.py).
+        summary.update(create_checker_bundle(export_dir, issue, pr, patch_path))
+
+        _dump_json(export_dir / "summary.json", summary)
+
+        # Remove the per-item worktree to keep only exported minimal
+        # artifacts; the mirror keeps the objects for the next item/run.
+        if created_now:
+            remove_repo(repo, mirror, repo_dir)
+            log(f"  - exported to {export_dir} and removed worktree")
+        else:
+            log(
+                f"  - exported to {export_dir}; repo kept because it existed before this run"
+            )
+
+    return summary
+
+
 def main() -> None:
+    global _CACHE_DIR, _CACHE_ENABLED, _CACHE_TTL_SECONDS
+
     parser = argparse.ArgumentParser(
         description="Batch-fetch repo issues/PRs and run Codex in each repo's Baseline."
     )
@@ -315,6 +1010,42 @@ def main() -> None:
         action="store_true",
         help="Generate files only; do not invoke codex",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Number of items to process concurrently (1 disables parallelism)",
+    )
+    parser.add_argument(
+        "--codex-jobs",
+        type=int,
+        default=1,
+        help="Max concurrent 'codex exec' invocations across all workers",
+    )
+    parser.add_argument(
+        "--keep-special",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Also keep pre-existing Dockerfile*/test artifacts (--no-keep-special "
+        "exports only files the agent touched)",
+    )
+    parser.add_argument(
+        "--cache-root",
+        default=str(Path.home() / ".cache" / "codex_pipeline"),
+        help="Root for persistent caches (GitHub API responses, bare repo mirrors)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk GitHub API cache",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=_CACHE_TTL_SECONDS,
+        help="GitHub API cache freshness window in seconds (expired REST entries "
+        "revalidate via ETag; GraphQL entries refetch)",
+    )
     parser.add_argument(
         "--result-root",
         default=os.path.join(os.getcwd(), "results"),
@@ -331,6 +1062,12 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    cache_root = Path(args.cache_root).expanduser().resolve()
+    _CACHE_DIR = cache_root / "gh"
+    _CACHE_ENABLED = not args.no_cache
+    _CACHE_TTL_SECONDS = args.cache_ttl
+    mirror_root = cache_root / "mirrors"
+
     if shutil.which("gh") is None:
         raise RuntimeError(
             "Missing required dependency: 'gh' (GitHub CLI).\n"
@@ -342,6 +1079,8 @@ def main() -> None:
             "Missing required dependency: 'codex'. Install it first (e.g. npm install -g @openai/codex)."
         )
 
+    _init_http_client()
+
     map_file = Path(args.map_file).expanduser().resolve()
     prompt_file = Path(args.prompt_file).expanduser().resolve()
     codex_template = Path(args.codex_template).expanduser().resolve()
@@ -358,99 +1097,42 @@ def main() -> None:
     base_env = os.environ.copy()
     base_env.update(exported_env)
 
-    for idx, item in enumerate(items, start=1):
-        repo = item["repo"]
-        issue_number = int(item["issue_number"])
-        pr_number = int(item["pr_number"])
-        print(f"[{idx}/{len(items)}] Processing {repo} issue#{issue_number} pr#{pr_number}")
+    jobs = max(1, args.jobs)
+    codex_gate = threading.BoundedSemaphore(max(1, args.codex_jobs))
+    total = len(items)
 
-        repo_dir, cloned_now = ensure_repo(repo, repos_root)
-        baseline_dir = repo_dir / args.baseline_dir_name
-        baseline_dir.mkdir(parents=True, exist_ok=True)
-        copied_checker_paths = copy_f2p_checker_files(f2p_checker_files, baseline_dir)
-
-        issue = gh_api_json(f"repos/{repo}/issues/{issue_number}")
-        pr = gh_api_json(f"repos/{repo}/pulls/{pr_number}")
-        patch_text = gh_api_text(
-            f"repos/{repo}/pulls/{pr_number}",
-            "application/vnd.github.v3.patch",
-        )
-
-        (baseline_dir / "issue.json").write_text(
-            json.dumps(issue, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
-        (baseline_dir / "pr.json").write_text(
-            json.dumps(pr, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+    def submit(item: dict) -> dict:
+        return process_item(
+            item,
+            args,
+            base_env,
+            codex_base_cmd,
+            prompt_template,
+            repos_root,
+            result_root,
+            mirror_root,
+            f2p_checker_files,
+            codex_gate,
         )
-        (baseline_dir / f"pr_{pr_number}.patch").write_text(patch_text, encoding="utf-8")
 
-        issue_body = issue.get("body", "") or ""
-        (baseline_dir / f"issue_{issue_number}.md").write_text(issue_body, encoding="utf-8")
-
-        codex_prompt = build_prompt(prompt_template, issue, pr)
-        codex_prompt_file = baseline_dir / f"codex_prompt_{issue_number}.md"
-        codex_prompt_file.write_text(codex_prompt, encoding="utf-8")
-
-        if args.dry_run:
-            print(f"  - dry-run: generated files in {baseline_dir}")
-            continue
-
-        cmd = codex_base_cmd + [codex_prompt]
-        print(f"  - running codex in {repo_dir} ...")
-        run_cmd(cmd, cwd=repo_dir, env=base_env, capture_output=False)
-
-        repo_name = repo.split("/")[-1]
-        export_dir = result_root / repo_name / str(issue_number)
-        meta_dir = export_dir / "metadata"
-        files_dir = export_dir / "files"
-        meta_dir.mkdir(parents=True, exist_ok=True)
-
-        # Export collected GitHub metadata/context.
-        shutil.copy2(baseline_dir / "issue.json", meta_dir / "issue.json")
-        shutil.copy2(baseline_dir / "pr.json", meta_dir / "pr.json")
-        shutil.copy2(baseline_dir / f"pr_{pr_number}.patch", meta_dir / f"pr_{pr_number}.patch")
-        shutil.copy2(baseline_dir / f"issue_{issue_number}.md", meta_dir / f"issue_{issue_number}.md")
-        shutil.copy2(codex_prompt_file, meta_dir / codex_prompt_file.name)
-        if copied_checker_paths:
-            checker_export_dir = meta_dir / "f2p_checker"
-            checker_export_dir.mkdir(parents=True, exist_ok=True)
-            for p in copied_checker_paths:
-                shutil.copy2(p, checker_export_dir / p.name)
-
-        # Keep agent outputs + Docker/Test artifacts in final package.
-        changed_paths = parse_changed_paths(repo_dir)
-        keep_paths = changed_paths | collect_special_files(repo_dir)
-        copy_repo_files(repo_dir, keep_paths, files_dir)
-
-        summary = {
-            "repo": repo,
-            "issue_number": issue_number,
-            "pr_number": pr_number,
-            "export_dir": str(export_dir),
-            "changed_files_count": len(changed_paths),
-            "kept_files_count": len(keep_paths),
-            "repo_removed": cloned_now,
-            "f2p_checker_files": [str(p) for p in copied_checker_paths],
-        }
-
-        # Generate checker-ready bundle (issue_*.json + *.dockerfile + test*.py).
-        summary.update(create_checker_bundle(export_dir, issue, pr, patch_text))
-
-        (export_dir / "summary.json").write_text(
-            json.dumps(summary, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
-
-        # Remove original cloned repo to keep only exported minimal artifacts.
-        if cloned_now:
-            shutil.rmtree(repo_dir)
-            print(f"  - exported to {export_dir} and removed cloned repo")
-        else:
-            print(
-                f"  - exported to {export_dir}; repo kept because it existed before this run"
+    if jobs == 1:
+        # Escape hatch: strictly sequential, identical to the original behavior.
+        for idx, item in enumerate(items, start=1):
+            log(
+                f"[{idx}/{total}] Processing {item['repo']} "
+                f"issue#{item['issue_number']} pr#{item['pr_number']}"
             )
+            submit(item)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as ex:
+            futures = {ex.submit(submit, item): item for item in items}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                item = futures[fut]
+                fut.result()
+                log(
+                    f"[{done}/{total}] Finished {item['repo']} "
+                    f"issue#{item['issue_number']} pr#{item['pr_number']}"
+                )
 
     print("All repositories processed.")
 